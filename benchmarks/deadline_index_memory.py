@@ -0,0 +1,78 @@
+"""Память индекса дедлайнов на одну задачу.
+
+Заполняет SQLite во временном каталоге невыполненными задачами и через
+tracemalloc сравнивает, сколько памяти удерживает:
+  - список словарей, как его возвращает load_open_tasks;
+  - индекс core.deadline_index (OpenTask со __slots__, _dues и _by_id).
+
+    python benchmarks/deadline_index_memory.py --tasks 10000 50000
+"""
+import argparse
+import gc
+import os
+import sqlite3
+import sys
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["USE_POSTGRES"] = "false"
+os.chdir(tempfile.mkdtemp())
+
+from core import database, deadline_index
+
+def fill(count):
+    """Пересоздает таблицу tasks с count невыполненными задачами"""
+    conn = sqlite3.connect(database.DB_FILE)
+    try:
+        conn.execute("DELETE FROM tasks")
+        start = date(2026, 1, 1)
+        conn.executemany(
+            "INSERT INTO tasks (task, deadline, employee, completed, created_at) VALUES (?, ?, ?, 0, ?)",
+            [(
+                f"Задание {i}",
+                (start + timedelta(days=i % 365)).strftime("%d.%m.%Y"),
+                f"@user{i % 50}",
+                "01.01.2026 10:00"
+            ) for i in range(count)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def retained(build):
+    """Байты, которые остаются занятыми после build() (пока жив результат)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    database.init_db()
+    # Прогрев: импорты и кэши первого вызова не должны попасть в замер
+    fill(1)
+    deadline_index.load_index()
+
+    print(f"{'задач':>8} {'dict, байт/задачу':>20} {'индекс, байт/задачу':>22}")
+    for count in args.tasks:
+        fill(count)
+        dict_bytes, rows = retained(database.load_open_tasks)
+        del rows
+
+        # Пустой индекс, чтобы измерить только построенный load_index
+        deadline_index._tasks, deadline_index._dues, deadline_index._by_id = [], [], {}
+        index_bytes, _ = retained(deadline_index.load_index)
+        print(f"{count:>8} {dict_bytes / count:>20.0f} {index_bytes / count:>22.0f}")
+
+if __name__ == "__main__":
+    main()
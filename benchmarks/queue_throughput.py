@@ -0,0 +1,87 @@
+"""Пропускная способность очереди обновлений в зависимости от числа воркеров.
+
+Кладет N синтетических обновлений в update_queue и замеряет, за сколько их
+разбирают W процессов через claim_updates/ack_updates с пустым обработчиком.
+Нужен только PostgreSQL (USE_POSTGRES=true и DB_* из .env), токен бота не нужен.
+Запускайте на тестовой базе: очередь должна быть пуста.
+
+    python benchmarks/queue_throughput.py --updates 5000 --chats 200 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Process
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import USE_POSTGRES
+from core.database import get_connection
+from core.update_queue import init_update_queue, claim_updates, ack_updates
+
+def queue_size(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT count(*) FROM update_queue")
+    size = cursor.fetchone()[0]
+    conn.rollback()
+    return size
+
+def fill_queue(updates, chats):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO update_queue (update_id, chat_id, payload) VALUES (%s, %s, %s)",
+        [(i, i % chats, '{"update_id": %d}' % i) for i in range(1, updates + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+def worker(batch_size, handler_ms):
+    conn = get_connection()
+    while True:
+        claimed = claim_updates(conn, batch_size)
+        if not claimed:
+            conn.rollback()
+            if queue_size(conn) == 0:
+                break
+            time.sleep(0.001)
+            continue
+        if handler_ms:
+            time.sleep(handler_ms / 1000 * len(claimed))
+        ack_updates(conn, [update_id for update_id, _ in claimed])
+    conn.close()
+
+def run(workers, args):
+    fill_queue(args.updates, args.chats)
+    started = time.perf_counter()
+    processes = [Process(target=worker, args=(args.batch_size, args.handler_ms)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--handler-ms", type=float, default=0.0, help="имитация времени обработчика на одно обновление")
+    args = parser.parse_args()
+
+    if not USE_POSTGRES:
+        sys.exit("Очередь обновлений работает только с PostgreSQL (USE_POSTGRES=true)")
+    init_update_queue()
+    conn = get_connection()
+    if queue_size(conn):
+        sys.exit("update_queue не пуста — запускайте бенчмарк на тестовой базе")
+    conn.close()
+
+    print(f"{'воркеров':>8} {'секунд':>8} {'обновлений/с':>13}")
+    for workers in args.workers:
+        elapsed = run(workers, args)
+        print(f"{workers:>8} {elapsed:>8.2f} {args.updates / elapsed:>13.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Проверка маршрутизации чтений: какие чтения обработчиков могут идти на реплику.
+
+Прогоняет callback_handler с поддельными callback-запросами и для каждого
+readonly-чтения записывает, было ли оно привязано к primary:
+  - list_all, list_active, list_late — чтения должны идти на реплику;
+  - complete_<id> — перерисовка после записи должна читать с primary.
+
+Без DB_REPLICA_DSNS проверяется только привязка (SQLite во временном каталоге
+по умолчанию). С USE_POSTGRES=true и DB_REPLICA_DSNS дополнительно считается,
+сколько чтений реально обслужила реплика.
+
+    python benchmarks/read_routing_check.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("USE_POSTGRES", "false")
+os.chdir(tempfile.mkdtemp())
+
+from core import database
+from handlers.callbacks import callback_handler
+
+_reads = []
+
+def _tracking_fetch(original):
+    def fetch(query, params=None):
+        pinned = database._primary_reads.get()
+        rows = original(query, params)
+        _reads.append((pinned, rows is not None))
+        return rows
+    return fetch
+
+async def _noop(*args, **kwargs):
+    return None
+
+def fake_update(data):
+    message = SimpleNamespace(chat_id=1, message_id=1)
+    query = SimpleNamespace(data=data, message=message, answer=_noop, edit_message_text=_noop)
+    return SimpleNamespace(callback_query=query, message=None)
+
+async def run(data):
+    """Обрабатывает callback как обновление: сброс маршрутизации, затем обработчик"""
+    _reads.clear()
+    database.reset_read_routing()
+    await callback_handler(fake_update(data), None)
+    return list(_reads)
+
+def main():
+    database.init_db()
+    task_id = database.insert_task("Проверка", "01.01.2030", "@check", "01.01.2026 10:00")
+    database.fetch_from_replica = _tracking_fetch(database.fetch_from_replica)
+
+    failed = False
+    cases = [("list_all", False), ("list_active", False), ("list_late", False), (f"complete_{task_id}", True)]
+    for data, expect_pinned in cases:
+        reads = asyncio.run(run(data))
+        pinned = sum(1 for was_pinned, _ in reads if was_pinned)
+        from_replica = sum(1 for _, served in reads if served)
+        ok = bool(reads) and all(was_pinned == expect_pinned for was_pinned, _ in reads)
+        failed = failed or not ok
+        print(f"{data:<14} чтений {len(reads)}, на primary {pinned}, с реплики {from_replica}: {'OK' if ok else 'ОШИБКА'}")
+
+    database.delete_task_by_id(task_id)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Накладные расходы на запрос: встроенный SQL (как до реестра) против SQL[...].
+
+Сравнивает на SQLite во временном каталоге:
+  - построение текста запроса (ветвление по плейсхолдерам и f-строки в
+    update_task против готовой строки из реестра);
+  - полный вызов load_tasks/update_task/delete+insert в старом и новом виде.
+
+    python benchmarks/statement_overhead.py --repeat 2000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["USE_POSTGRES"] = "false"
+os.chdir(tempfile.mkdtemp())
+
+from core import database
+from core.statements import SQL, update_task_statement
+
+USE_POSTGRES = False
+
+# Старый вариант: запросы собираются в каждой функции
+def old_update_query(completed=None, task=None, deadline=None, employee=None):
+    updates = []
+    params = []
+    if completed is not None:
+        updates.append("completed = %s" if USE_POSTGRES else "completed = ?")
+        params.append(1 if completed else 0)
+    if task is not None:
+        updates.append("task = %s" if USE_POSTGRES else "task = ?")
+        params.append(task)
+    if deadline is not None:
+        updates.append("deadline = %s" if USE_POSTGRES else "deadline = ?")
+        params.append(deadline)
+    if employee is not None:
+        updates.append("employee = %s" if USE_POSTGRES else "employee = ?")
+        params.append(employee)
+    params.append(1)
+    placeholder = "%s" if USE_POSTGRES else "?"
+    return f"UPDATE tasks SET {', '.join(updates)} WHERE id = {placeholder}", params
+
+def new_update_query(completed=None, task=None, deadline=None, employee=None):
+    changes = {
+        field: value for field, value in (
+            ("completed", completed), ("task", task), ("deadline", deadline), ("employee", employee)
+        ) if value is not None
+    }
+    params = [(1 if value else 0) if field == "completed" else value for field, value in changes.items()]
+    params.append(1)
+    return update_task_statement(tuple(changes)), params
+
+def old_execute(query, params=None, fetch=False):
+    conn = sqlite3.connect(database.DB_FILE)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params or ())
+        if fetch:
+            return cursor.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+
+def old_load_tasks():
+    rows = old_execute("SELECT id, task, deadline, employee, completed, created_at FROM tasks", fetch=True)
+    return [{
+        "id": row[0],
+        "task": row[1],
+        "deadline": row[2],
+        "employee": row[3],
+        "completed": bool(row[4]),
+        "created_at": row[5]
+    } for row in rows]
+
+def old_update_task(task_id, **fields):
+    query, params = old_update_query(**fields)
+    params[-1] = task_id
+    old_execute(query, params)
+
+def new_update_task(task_id, **fields):
+    query, params = new_update_query(**fields)
+    params[-1] = task_id
+    database.execute_db(query, params)
+
+def report(name, old, new, repeat):
+    old_time = min(timeit.repeat(old, number=repeat, repeat=3)) / repeat * 1e6
+    new_time = min(timeit.repeat(new, number=repeat, repeat=3)) / repeat * 1e6
+    print(f"{name:<28} {old_time:>10.2f} {new_time:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=50)
+    args = parser.parse_args()
+
+    database.init_db()
+    for i in range(args.tasks):
+        database.insert_task(f"Задание {i}", "01.01.2030", f"@user{i % 5}", "01.01.2026 10:00")
+
+    print(f"{'мкс на вызов':<28} {'до':>10} {'после':>10}")
+    report("текст update_task", lambda: old_update_query(task="x", deadline="02.01.2030"),
+           lambda: new_update_query(task="x", deadline="02.01.2030"), args.repeat * 10)
+    report("update_task (SQLite)", lambda: old_update_task(1, task="x"),
+           lambda: new_update_task(1, task="x"), args.repeat)
+    report(f"load_tasks, {args.tasks} строк", old_load_tasks, lambda: database.execute_db(SQL["load_tasks"], fetch=True),
+           args.repeat)
+
+if __name__ == "__main__":
+    main()
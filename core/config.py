@@ -15,9 +15,37 @@ DB_USER = os.getenv("DB_USER", "tg_user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "tg_pass")
 USE_POSTGRES = os.getenv("USE_POSTGRES", "true").lower() == "true"
 
+# Реплики для чтения списков и отчетов: строки подключения libpq через запятую,
+# например "host=replica1 port=5432 dbname=tg_db user=tg_user password=tg_pass"
+DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv("DB_REPLICA_DSNS", "").split(",") if dsn.strip()]
+MAX_REPLICA_LAG = float(os.getenv("MAX_REPLICA_LAG", "5"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "10"))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+
 # Токен бота
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# Индекс дедлайнов: горизонт списка "Скоро дедлайн" и период сверки с БД
+DUE_SOON_DAYS = int(os.getenv("DUE_SOON_DAYS", "3"))
+DEADLINE_INDEX_CHECK_INTERVAL = float(os.getenv("DEADLINE_INDEX_CHECK_INTERVAL", "600"))
+
+# Администраторы бота (Telegram user ID через запятую)
+ADMIN_IDS = {int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip()}
+
+# Профилирование обработчиков по команде /profile
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# Режим запуска: polling (один процесс), receiver (пишет обновления в очередь)
+# или worker (обрабатывает обновления из очереди, можно запускать несколько)
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "10"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "0.5"))
+
+# Журнал событий задач: буфер сбрасывается в БД по размеру или по времени
+EVENT_LOG_BATCH_SIZE = int(os.getenv("EVENT_LOG_BATCH_SIZE", "50"))
+EVENT_LOG_FLUSH_INTERVAL = float(os.getenv("EVENT_LOG_FLUSH_INTERVAL", "2"))
+
 # Текстовые сообщения
 MAIN_MENU_TEXT = "Привет! Я бот для управления заданиями.\n\nВыберите действие:"
 
@@ -26,7 +54,8 @@ HELP_TEXT = (
     "Доступные команды:\n"
     "/start или /menu - Главное меню\n"
     "/add_task - Добавить новое задание\n"
-    "/list_tasks - Показать все задания\n\n"
+    "/list_tasks - Показать все задания\n"
+    "/my_tasks - Мои активные задания\n\n"
     "Выберите действие:"
 )
 
@@ -1,11 +1,94 @@
 import sqlite3
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from contextvars import ContextVar
 from datetime import datetime
 import time
 from core.config import (
-    DB_FILE, USE_POSTGRES, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+    DB_FILE, USE_POSTGRES, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD,
+    DB_REPLICA_DSNS, MAX_REPLICA_LAG, REPLICA_CHECK_INTERVAL, REPLICA_CONNECT_TIMEOUT
 )
+from core.events import publish_change, committed_change
+from core.event_log import record_event
+from core.statements import SQL, update_task_statement
+from core.utils import employee_username
+
+# После записи чтения в рамках того же обновления идут на primary
+_primary_reads = ContextVar("primary_reads", default=False)
+# dsn -> (время проверки, реплика пригодна)
+_replica_status = {}
+_replica_cursor = 0
+
+def route_reads_to_primary():
+    """Направляет последующие чтения текущего обновления на primary"""
+    _primary_reads.set(True)
+
+def reset_read_routing():
+    """Сбрасывает привязку чтений к primary (в начале каждого обновления)"""
+    _primary_reads.set(False)
+
+def replica_lag(conn):
+    """Отставание реплики в секундах (0, если сервер не в режиме восстановления)"""
+    cursor = conn.cursor()
+    cursor.execute(SQL["replica_lag"])
+    lag = cursor.fetchone()[0]
+    conn.rollback()
+    return float(lag)
+
+def mark_replica_down(dsn):
+    _replica_status[dsn] = (time.monotonic(), False)
+
+def get_replica_connection():
+    """Возвращает (dsn, соединение) с пригодной репликой или (None, None)"""
+    global _replica_cursor
+    now = time.monotonic()
+    
+    for i in range(len(DB_REPLICA_DSNS)):
+        dsn = DB_REPLICA_DSNS[(_replica_cursor + i) % len(DB_REPLICA_DSNS)]
+        checked_at, healthy = _replica_status.get(dsn, (None, True))
+        fresh = checked_at is not None and now - checked_at < REPLICA_CHECK_INTERVAL
+        if fresh and not healthy:
+            continue
+        
+        conn = None
+        try:
+            # Подключение идет в потоке event loop: недоступная реплика не должна его надолго блокировать
+            conn = psycopg2.connect(dsn, connect_timeout=REPLICA_CONNECT_TIMEOUT)
+            if not fresh:
+                healthy = replica_lag(conn) <= MAX_REPLICA_LAG
+                _replica_status[dsn] = (now, healthy)
+        except psycopg2.Error as e:
+            print(f"Реплика недоступна, чтение с primary: {e}")
+            if conn is not None:
+                conn.close()
+            mark_replica_down(dsn)
+            continue
+        
+        if not healthy:
+            conn.close()
+            continue
+        _replica_cursor = (_replica_cursor + i + 1) % len(DB_REPLICA_DSNS)
+        return dsn, conn
+    return None, None
+
+def fetch_from_replica(query, params=None):
+    """Выполняет чтение на реплике; None, если читать нужно с primary"""
+    if not (USE_POSTGRES and DB_REPLICA_DSNS) or _primary_reads.get():
+        return None
+    
+    dsn, conn = get_replica_connection()
+    if conn is None:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params or ())
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    except psycopg2.Error as e:
+        print(f"Ошибка чтения с реплики, повтор на primary: {e}")
+        mark_replica_down(dsn)
+        return None
+    finally:
+        conn.close()
 
 def get_connection():
     """Возвращает соединение с БД (PostgreSQL или SQLite)"""
@@ -52,6 +135,16 @@ def init_db():
     
     if USE_POSTGRES:
         # PostgreSQL схемы
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS employees (
+                id SERIAL PRIMARY KEY,
+                telegram_id BIGINT UNIQUE,
+                username TEXT UNIQUE,
+                name TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS tasks (
                 id SERIAL PRIMARY KEY,
@@ -75,8 +168,56 @@ def init_db():
                 created_at TEXT NOT NULL
             )
         """)
+        
+        # Журнал событий только дописывается; id служит курсором синхронизации
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS task_events (
+                id BIGSERIAL PRIMARY KEY,
+                event_type TEXT NOT NULL,
+                task_id INTEGER,
+                data TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        
+        # Состояние диалогов и открытые списки общие для всех воркеров
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dialog_state (
+                user_id BIGINT PRIMARY KEY,
+                state TEXT NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS live_messages (
+                chat_id BIGINT NOT NULL,
+                message_id BIGINT NOT NULL,
+                view TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                tracked_at DOUBLE PRECISION NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS profile_settings (
+                id INTEGER PRIMARY KEY,
+                remaining INTEGER NOT NULL,
+                percent DOUBLE PRECISION NOT NULL
+            )
+        """)
     else:
         # SQLite схемы (для обратной совместимости)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS employees (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                telegram_id INTEGER UNIQUE,
+                username TEXT UNIQUE,
+                name TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS tasks (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -100,174 +241,332 @@ def init_db():
                 created_at TEXT NOT NULL
             )
         """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS task_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                task_id INTEGER,
+                data TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dialog_state (
+                user_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS live_messages (
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                view TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                tracked_at REAL NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS profile_settings (
+                id INTEGER PRIMARY KEY,
+                remaining INTEGER NOT NULL,
+                percent REAL NOT NULL
+            )
+        """)
+    
+    # Миграция: ссылки на справочник сотрудников
+    for table in ("tasks", "late_employees"):
+        add_column_if_missing(cursor, table, "employee_id", "INTEGER REFERENCES employees(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS tasks_employee_idx ON tasks (employee_id, completed, deadline)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS late_employees_employee_idx ON late_employees (employee_id)")
     
     conn.commit()
     conn.close()
+    backfill_employee_ids()
+
+def add_column_if_missing(cursor, table, column, definition):
+    """Добавляет столбец в существующую таблицу"""
+    if USE_POSTGRES:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+    else:
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def execute_db(query, params=None, fetch=False, event=None, readonly=False, pin_reads=False):
+    """Выполняет запрос к БД; event=(action, task_id, data) публикуется вместе с записью.
 
-def execute_db(query, params=None, fetch=False):
-    """Выполняет запрос к БД"""
+    Для записи возвращает число измененных строк. readonly-чтения идут на
+    реплику, если она настроена и пригодна. Запись задач, опозданий и
+    сотрудников передает pin_reads=True: остальные чтения того же обновления
+    идут на primary и видят эту запись. Служебные записи (состояние диалога,
+    открытые списки) чтения не привязывают.
+    """
+    if fetch and readonly:
+        rows = fetch_from_replica(query, params)
+        if rows is not None:
+            return rows
+    
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+        cursor.execute(query, params or ())
         
         if fetch:
-            if USE_POSTGRES:
-                # Для PostgreSQL возвращаем словари
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-                result = cursor.fetchall()
-                return [dict(row) for row in result]
-            else:
-                result = cursor.fetchall()
-                return result
+            # Строки как словари для обеих СУБД
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
         else:
+            # Запрос, не затронувший строк (повторное удаление, несуществующий id),
+            # не попадает ни в уведомления, ни в журнал событий
+            changed = cursor.rowcount
+            if event and changed:
+                publish_change(cursor, event[0], event[1])
             conn.commit()
-            return None
+            if pin_reads:
+                route_reads_to_primary()
+            if event and changed:
+                committed_change(event[0], event[1])
+                record_event(*event)
+            return changed
     finally:
         conn.close()
 
 # Функции для задач
 def load_tasks():
     """Загружает все задачи из БД"""
-    rows = execute_db("SELECT id, task, deadline, employee, completed, created_at FROM tasks", fetch=True)
-    
-    if USE_POSTGRES:
-        return [{
-            "id": row["id"],
-            "task": row["task"],
-            "deadline": row["deadline"],
-            "employee": row["employee"],
-            "completed": bool(row["completed"]),
-            "created_at": row["created_at"]
-        } for row in rows] if rows else []
-    else:
-        return [{
-            "id": row[0],
-            "task": row[1],
-            "deadline": row[2],
-            "employee": row[3],
-            "completed": bool(row[4]),
-            "created_at": row[5]
-        } for row in rows] if rows else []
-
-def insert_task(task, deadline, employee, created_at):
+    rows = execute_db(SQL["load_tasks"], fetch=True, readonly=True)
+    for row in rows:
+        row["completed"] = bool(row["completed"])
+    return rows
+
+def load_open_tasks():
+    """Загружает невыполненные задачи с primary (для индекса дедлайнов)"""
+    return execute_db(SQL["load_open_tasks"], fetch=True)
+
+def load_task(task_id):
+    """Загружает задачу по ID с primary или возвращает None"""
+    rows = execute_db(SQL["load_task"], (task_id,), fetch=True)
+    if not rows:
+        return None
+    rows[0]["completed"] = bool(rows[0]["completed"])
+    return rows[0]
+
+def insert_task(task, deadline, employee, created_at, employee_id=None):
     """Добавляет новую задачу в БД"""
     conn = get_connection()
-    cursor = conn.cursor()
-    
-    if USE_POSTGRES:
-        cursor.execute("""
-            INSERT INTO tasks (task, deadline, employee, completed, created_at)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """, (task, deadline, employee, 0, created_at))
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SQL["insert_task"], (task, deadline, employee, employee_id, created_at))
         task_id = cursor.fetchone()[0]
-    else:
-        cursor.execute("""
-            INSERT INTO tasks (task, deadline, employee, completed, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (task, deadline, employee, 0, created_at))
-        task_id = cursor.lastrowid
-    
-    conn.commit()
-    conn.close()
+        publish_change(cursor, "created", task_id)
+        conn.commit()
+        route_reads_to_primary()
+    finally:
+        conn.close()
+    committed_change("created", task_id)
+    record_event("created", task_id, {
+        "task": task,
+        "deadline": deadline,
+        "employee": employee,
+        "employee_id": employee_id
+    })
     return task_id
 
-def update_task(task_id, completed=None, task=None, deadline=None, employee=None):
-    """Обновляет задачу в БД"""
-    updates = []
-    params = []
+def update_task(task_id, completed=None, task=None, deadline=None, employee=None, employee_id=None):
+    """Обновляет задачу в БД; возвращает False, если задача не найдена (или уже выполнена)"""
+    changes = {
+        field: value for field, value in (
+            ("completed", completed), ("task", task), ("deadline", deadline),
+            ("employee", employee), ("employee_id", employee_id)
+        ) if value is not None
+    }
+    if not changes:
+        return False
     
-    if completed is not None:
-        updates.append("completed = %s" if USE_POSTGRES else "completed = ?")
-        params.append(1 if completed else 0)
-    if task is not None:
-        updates.append("task = %s" if USE_POSTGRES else "task = ?")
-        params.append(task)
-    if deadline is not None:
-        updates.append("deadline = %s" if USE_POSTGRES else "deadline = ?")
-        params.append(deadline)
-    if employee is not None:
-        updates.append("employee = %s" if USE_POSTGRES else "employee = ?")
-        params.append(employee)
-    
-    if updates:
-        params.append(task_id)
-        placeholder = "%s" if USE_POSTGRES else "?"
-        query = f"UPDATE tasks SET {', '.join(updates)} WHERE id = {placeholder}"
-        execute_db(query, params)
+    params = [(1 if value else 0) if field == "completed" else value for field, value in changes.items()]
+    params.append(task_id)
+    action = "completed" if completed else "edited"
+    # Повторное выполнение не совпадает ни с одной строкой и не дает события
+    query = update_task_statement(tuple(changes), only_open=bool(completed))
+    return execute_db(query, params, event=(action, task_id, changes), pin_reads=True) > 0
 
 def delete_task_by_id(task_id):
-    """Удаляет задачу по ID"""
-    execute_db("DELETE FROM tasks WHERE id = %s" if USE_POSTGRES else "DELETE FROM tasks WHERE id = ?", (task_id,))
+    """Удаляет задачу по ID; возвращает False, если задачи не было"""
+    return execute_db(SQL["delete_task"], (task_id,), event=("deleted", task_id, None), pin_reads=True) > 0
 
 # Функции для опозданий
-def insert_late_employee(employee, employee_name=None, late_time=None, message_text=None, created_by=None):
+def insert_late_employee(employee, employee_name=None, late_time=None, message_text=None, created_by=None, employee_id=None):
     """Добавляет запись об опоздании сотрудника"""
     date = datetime.now().strftime("%d.%m.%Y")
     created_at = datetime.now().strftime("%d.%m.%Y %H:%M")
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if USE_POSTGRES:
-        cursor.execute("""
-            INSERT INTO late_employees (employee, employee_name, late_time, date, message_text, created_by, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (employee, employee_name, late_time, date, message_text, created_by, created_at))
-    else:
-        cursor.execute("""
-            INSERT INTO late_employees (employee, employee_name, late_time, date, message_text, created_by, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (employee, employee_name, late_time, date, message_text, created_by, created_at))
-    
-    conn.commit()
-    conn.close()
+    execute_db(
+        SQL["insert_late_employee"],
+        (employee, employee_id, employee_name, late_time, date, message_text, created_by, created_at),
+        pin_reads=True
+    )
+    record_event("late_recorded", None, {
+        "employee": employee,
+        "employee_id": employee_id,
+        "employee_name": employee_name,
+        "late_time": late_time,
+        "date": date,
+        "created_by": created_by
+    })
 
 def load_late_employees(date=None, employee=None):
     """Загружает записи об опозданиях"""
-    query = "SELECT id, employee, employee_name, late_time, date, message_text, created_by, created_at FROM late_employees WHERE 1=1"
-    params = []
-    
-    if date:
-        query += " AND date = %s" if USE_POSTGRES else " AND date = ?"
-        params.append(date)
+    return execute_db(SQL["load_late_employees"], (date or None, employee or None), fetch=True, readonly=True)
+
+# Функции для сотрудников
+def execute_returning_id(query, params):
+    """Выполняет INSERT ... RETURNING id и возвращает id"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        row_id = cursor.fetchone()[0]
+        conn.commit()
+        route_reads_to_primary()
+        return row_id
+    finally:
+        conn.close()
+
+def get_or_create_employee(employee, telegram_id=None, name=None, telegram_username=None):
+    """Возвращает id сотрудника из справочника, при необходимости создает запись.
+
+    Для известного telegram_id ключом служит только его настоящий username
+    (telegram_username), а не текст сотрудника: отображаемое имя "Ivan"
+    не должно занимать запись @ivan.
+    """
+    if telegram_id is not None:
+        rows = execute_db(SQL["find_employee_by_telegram_id"], (telegram_id,), fetch=True)
+        if rows:
+            return rows[0]["id"]
+        username = employee_username(telegram_username)
+    elif not employee or employee == "Не указан":
+        return None
+    else:
+        username = employee_username(employee)
     
-    if employee:
-        query += " AND employee = %s" if USE_POSTGRES else " AND employee = ?"
-        params.append(employee)
+    created_at = datetime.now().strftime("%d.%m.%Y %H:%M")
+    if username:
+        if telegram_id is not None:
+            rows = execute_db(SQL["find_employee_by_username"], (username,), fetch=True)
+            if rows and rows[0]["telegram_id"] not in (None, telegram_id):
+                # Username перешел к другому пользователю Telegram — освобождаем его у прежнего
+                execute_db(SQL["release_employee_username"], (rows[0]["id"],), pin_reads=True)
+        return execute_returning_id(SQL["upsert_employee_by_username"], (telegram_id, username, name, created_at))
     
-    query += " ORDER BY date DESC, created_at DESC"
-    rows = execute_db(query, params, fetch=True)
+    name = name or employee
+    if telegram_id is None:
+        rows = execute_db(SQL["find_employee_by_name"], (name,), fetch=True)
+        if rows:
+            return rows[0]["id"]
+    return execute_returning_id(SQL["insert_employee"], (telegram_id, None, name, created_at))
+
+def find_employee(telegram_id, username=None):
+    """Находит сотрудника пользователя Telegram и привязывает к нему Telegram ID"""
+    rows = execute_db(SQL["find_employee_by_telegram_id"], (telegram_id,), fetch=True)
+    if rows:
+        return rows[0]["id"]
     
+    username = employee_username(username)
+    if not username:
+        return None
+    rows = execute_db(SQL["find_employee_by_username"], (username,), fetch=True)
     if not rows:
-        return []
+        return None
+    if rows[0]["telegram_id"] is not None:
+        # Запись принадлежит другому пользователю (username мог быть переназначен)
+        return None
     
-    if USE_POSTGRES:
-        return [{
-            "id": row["id"],
-            "employee": row["employee"],
-            "employee_name": row["employee_name"],
-            "late_time": row["late_time"],
-            "date": row["date"],
-            "message_text": row["message_text"],
-            "created_by": row["created_by"],
-            "created_at": row["created_at"]
-        } for row in rows]
+    execute_db(SQL["link_employee_telegram_id"], (telegram_id, rows[0]["id"]), pin_reads=True)
+    # Привязка срабатывает, только если запись еще ни к кому не привязана
+    rows = execute_db(SQL["find_employee_by_telegram_id"], (telegram_id,), fetch=True)
+    return rows[0]["id"] if rows else None
+
+def load_employee_tasks(employee_id):
+    """Загружает невыполненные задачи сотрудника"""
+    rows = execute_db(SQL["load_employee_tasks"], (employee_id,), fetch=True, readonly=True)
+    for row in rows:
+        row["completed"] = bool(row["completed"])
+    return rows
+
+def backfill_employee_ids():
+    """Проставляет employee_id записям, созданным до появления справочника"""
+    for select_name, update_name in (
+        ("pending_task_employees", "set_task_employee_id"),
+        ("pending_late_employees", "set_late_employee_id"),
+    ):
+        for row in execute_db(SQL[select_name], fetch=True):
+            employee_id = get_or_create_employee(row["employee"])
+            if employee_id:
+                execute_db(SQL[update_name], (employee_id, row["employee"]))
+
+# Состояние диалогов (общее для всех воркеров)
+def get_dialog_state(user_id):
+    """Возвращает состояние диалога пользователя или None"""
+    rows = execute_db(SQL["get_dialog_state"], (user_id,), fetch=True)
+    return rows[0]["state"] if rows else None
+
+def set_dialog_state(user_id, state):
+    """Сохраняет состояние диалога; None сбрасывает его"""
+    if state is None:
+        execute_db(SQL["delete_dialog_state"], (user_id,))
     else:
-        return [{
-            "id": row[0],
-            "employee": row[1],
-            "employee_name": row[2],
-            "late_time": row[3],
-            "date": row[4],
-            "message_text": row[5],
-            "created_by": row[6],
-            "created_at": row[7]
-        } for row in rows]
+        execute_db(SQL["set_dialog_state"], (user_id, state))
+
+# Настройки профилирования (общие для всех воркеров)
+def get_profile_settings():
+    """Возвращает (осталось обновлений, процент трафика)"""
+    rows = execute_db(SQL["get_profile_settings"], fetch=True)
+    if not rows:
+        return 0, 0.0
+    return rows[0]["remaining"], rows[0]["percent"]
+
+def set_profile_settings(remaining, percent):
+    execute_db(SQL["set_profile_settings"], (remaining, percent))
+
+def take_profile_slot():
+    """Уменьшает счетчик "следующие N обновлений"; False, если он уже исчерпан"""
+    return execute_db(SQL["take_profile_slot"]) > 0
+
+def try_advisory_lock(key):
+    """Берет advisory lock PostgreSQL без ожидания; возвращает соединение-держатель или None.
+
+    Блокировка снимается при закрытии соединения.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(SQL["try_advisory_lock"], (key,))
+    if cursor.fetchone()[0]:
+        conn.commit()
+        return conn
+    conn.close()
+    return None
+
+# Открытые списки заданий для автообновления
+def track_live_message(chat_id, message_id, view, text_hash, max_tracked):
+    """Запоминает, какой список показывает сообщение, и ограничивает их число"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SQL["track_live_message"], (chat_id, message_id, view, text_hash, time.time()))
+        cursor.execute(SQL["trim_live_messages"], (max_tracked,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def untrack_live_message(chat_id, message_id):
+    execute_db(SQL["untrack_live_message"], (chat_id, message_id))
+
+def load_live_messages():
+    return execute_db(SQL["load_live_messages"], fetch=True)
+
+def update_live_message_hash(chat_id, message_id, text_hash):
+    execute_db(SQL["update_live_message_hash"], (text_hash, chat_id, message_id))
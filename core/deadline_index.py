@@ -0,0 +1,128 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from core.config import DEADLINE_INDEX_CHECK_INTERVAL
+from core.events import subscribe, on_listener_resync
+from core.utils import deadline_to_datetime
+
+# Индекс невыполненных задач в памяти, упорядоченный по (дедлайн, id).
+# Просроченные и ближайшие задачи — это bisect по _dues и срез _tasks.
+
+class OpenTask:
+    __slots__ = ("due", "id", "task", "deadline", "employee", "created_at")
+
+    def __init__(self, row):
+        self.due = deadline_to_datetime(row["deadline"]).date().toordinal()
+        self.id = row["id"]
+        self.task = row["task"]
+        self.deadline = row["deadline"]
+        self.employee = row["employee"]
+        self.created_at = row["created_at"]
+
+    def __lt__(self, other):
+        return (self.due, self.id) < (other.due, other.id)
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "task": self.task,
+            "deadline": self.deadline,
+            "employee": self.employee,
+            "completed": False,
+            "created_at": self.created_at
+        }
+
+_tasks = []
+_dues = []
+_by_id = {}
+_loaded = False
+_check_task = None
+
+def load_index():
+    """Строит индекс из БД и подписывает его на изменения задач"""
+    global _tasks, _dues, _by_id, _loaded
+    from core.database import load_open_tasks
+    records = sorted(OpenTask(row) for row in load_open_tasks())
+    _tasks = records
+    _dues = [record.due for record in records]
+    _by_id = {record.id: record for record in records}
+    _loaded = True
+    subscribe(apply_change)
+
+def _add(record):
+    pos = bisect_right(_tasks, record)
+    _tasks.insert(pos, record)
+    _dues.insert(pos, record.due)
+    _by_id[record.id] = record
+
+def _remove(task_id):
+    record = _by_id.pop(task_id, None)
+    if record is None:
+        return
+    pos = bisect_left(_tasks, record)
+    del _tasks[pos]
+    del _dues[pos]
+
+def apply_change(action, task_id):
+    """Обновляет индекс по событию об изменении задачи"""
+    from core.database import load_task
+    if not _loaded or task_id is None:
+        return
+
+    _remove(task_id)
+    if action in ("deleted", "completed"):
+        return
+    row = load_task(task_id)
+    if row and not row["completed"]:
+        _add(OpenTask(row))
+
+def _ensure_loaded():
+    if not _loaded:
+        load_index()
+
+def overdue_tasks(today=None):
+    """Невыполненные задачи с дедлайном раньше сегодняшнего дня"""
+    _ensure_loaded()
+    today = today or date.today()
+    end = bisect_left(_dues, today.toordinal())
+    return [record.as_dict() for record in _tasks[:end]]
+
+def due_within(days, today=None):
+    """Невыполненные задачи с дедлайном от сегодня до сегодня + days включительно"""
+    _ensure_loaded()
+    today = today or date.today()
+    start = bisect_left(_dues, today.toordinal())
+    end = bisect_right(_dues, (today + timedelta(days=days)).toordinal())
+    return [record.as_dict() for record in _tasks[start:end]]
+
+def check_consistency():
+    """Сверяет индекс с БД, возвращает id расхождений"""
+    from core.database import load_open_tasks
+    expected = {row["id"]: OpenTask(row) for row in load_open_tasks()}
+    field_names = OpenTask.__slots__
+    mismatched = set(expected) ^ set(_by_id)
+    for task_id in set(expected) & set(_by_id):
+        actual, wanted = _by_id[task_id], expected[task_id]
+        if any(getattr(actual, name) != getattr(wanted, name) for name in field_names):
+            mismatched.add(task_id)
+    return mismatched
+
+async def _check_loop():
+    while True:
+        await asyncio.sleep(DEADLINE_INDEX_CHECK_INTERVAL)
+        try:
+            mismatched = check_consistency()
+            if mismatched:
+                print(f"Индекс дедлайнов расходится с БД ({len(mismatched)} задач), перестраиваем")
+                load_index()
+        except Exception as e:
+            print(f"Не удалось сверить индекс дедлайнов: {e}")
+
+def start_deadline_index():
+    """Загружает индекс и запускает периодическую сверку (вызывать из event loop)"""
+    global _check_task
+    load_index()
+    # Изменения, пропущенные без слушателя, не ждут периодической сверки
+    on_listener_resync(load_index)
+    if _check_task is None:
+        _check_task = asyncio.get_running_loop().create_task(_check_loop())
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from datetime import datetime
+from core.config import USE_POSTGRES, EVENT_LOG_BATCH_SIZE, EVENT_LOG_FLUSH_INTERVAL
+from core.statements import SQL
+
+# Типы событий: created, completed, edited, deleted, late_recorded
+# Ключ advisory lock, упорядочивающего сброс буферов разных процессов
+FLUSH_LOCK = 28028
+
+_buffer = []
+_wakeup = None
+_flush_task = None
+
+def record_event(event_type, task_id=None, data=None):
+    """Добавляет событие в буфер; в БД события пишутся пакетами"""
+    created_at = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+    payload = json.dumps(data, ensure_ascii=False) if data is not None else None
+    _buffer.append((event_type, task_id, payload, created_at))
+    
+    if len(_buffer) >= EVENT_LOG_BATCH_SIZE:
+        if _wakeup is not None:
+            _wakeup.set()
+        else:
+            # Фоновый сброс не запущен (скрипты, миграции) — пишем сразу
+            flush_events()
+
+def flush_events():
+    """Записывает накопленные события одной транзакцией"""
+    global _buffer
+    from core.database import get_connection
+    if not _buffer:
+        return 0
+    
+    batch, _buffer = _buffer, []
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if USE_POSTGRES:
+            # Id берутся из последовательности внутри транзакции под блокировкой,
+            # поэтому транзакции фиксируются в порядке id: читатель с курсором
+            # id > cursor не пропустит события, зафиксированные позже
+            cursor.execute(SQL["advisory_xact_lock"], (FLUSH_LOCK,))
+        cursor.executemany(SQL["insert_task_event"], batch)
+        conn.commit()
+    except Exception:
+        # Возвращаем пакет в начало буфера, попробуем при следующем сбросе
+        _buffer = batch + _buffer
+        raise
+    finally:
+        conn.close()
+    return len(batch)
+
+async def _flush_loop():
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), EVENT_LOG_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        try:
+            flush_events()
+        except Exception as e:
+            print(f"Не удалось записать журнал событий: {e}")
+
+def start_event_log():
+    """Запускает фоновый сброс буфера событий (вызывать из event loop)"""
+    global _wakeup, _flush_task
+    if _flush_task is not None:
+        return
+    _wakeup = asyncio.Event()
+    _flush_task = asyncio.get_running_loop().create_task(_flush_loop())
+
+def stop_event_log():
+    """Останавливает фоновый сброс и записывает остаток буфера"""
+    global _wakeup, _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+    _flush_task = None
+    _wakeup = None
+    flush_events()
+
+def load_events_since(cursor=0, limit=500):
+    """Возвращает события с id > cursor и новый курсор для следующего запроса"""
+    from core.database import execute_db
+    events = execute_db(SQL["load_task_events"], (cursor, limit), fetch=True, readonly=True)
+    for event in events:
+        event["data"] = json.loads(event["data"]) if event["data"] else None
+    
+    next_cursor = events[-1]["id"] if events else cursor
+    return events, next_cursor
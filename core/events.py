@@ -0,0 +1,93 @@
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from core.config import USE_POSTGRES
+from core.statements import SQL
+
+# Канал PostgreSQL для событий об изменении задач
+TASKS_CHANNEL = "tasks_changed"
+LISTENER_RECONNECT_DELAY = 5
+
+_subscribers = []
+_resync_callbacks = []
+_listener_conn = None
+
+def subscribe(callback):
+    """Подписывает callback(action, task_id) на изменения задач"""
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+def on_listener_resync(callback):
+    """Подписывает callback() на переподключение слушателя.
+
+    Уведомления, отправленные, пока слушателя не было, потеряны — подписчик
+    должен заново прочитать состояние из БД.
+    """
+    if callback not in _resync_callbacks:
+        _resync_callbacks.append(callback)
+
+def dispatch(action, task_id):
+    """Рассылает событие подписчикам внутри процесса"""
+    for callback in list(_subscribers):
+        try:
+            callback(action, task_id)
+        except Exception as e:
+            # Запись уже зафиксирована — ошибка подписчика не должна до нее доходить
+            print(f"Ошибка подписчика {getattr(callback, '__name__', callback)} на {action}:{task_id}: {e}")
+
+def publish_change(cursor, action, task_id):
+    """Публикует изменение задачи в рамках текущей транзакции"""
+    if USE_POSTGRES:
+        # NOTIFY доставляется слушателям только после commit
+        cursor.execute(SQL["notify"], (TASKS_CHANNEL, f"{action}:{task_id}"))
+
+def committed_change(action, task_id):
+    """Вызывается после commit: в SQLite нет NOTIFY — используем шину внутри процесса"""
+    if not USE_POSTGRES:
+        dispatch(action, task_id)
+
+def start_listener(loop, resync=False):
+    """Подписывается на канал PostgreSQL и пересылает уведомления подписчикам.
+
+    resync — слушатель переподключается после разрыва или неудачной попытки.
+    """
+    global _listener_conn
+    from core.database import get_connection
+    if not USE_POSTGRES:
+        return
+
+    try:
+        conn = get_connection()
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        conn.cursor().execute(f"LISTEN {TASKS_CHANNEL}")
+    except psycopg2.Error as e:
+        print(f"Не удалось подписаться на {TASKS_CHANNEL}: {e}")
+        loop.call_later(LISTENER_RECONNECT_DELAY, start_listener, loop, True)
+        return
+
+    _listener_conn = conn
+    loop.add_reader(conn.fileno(), _on_notify, loop)
+    if resync:
+        # LISTEN уже активен: изменения после этой точки придут уведомлениями
+        for callback in list(_resync_callbacks):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Ошибка пересинхронизации {getattr(callback, '__name__', callback)}: {e}")
+
+def _on_notify(loop):
+    global _listener_conn
+    conn = _listener_conn
+    try:
+        conn.poll()
+    except psycopg2.Error as e:
+        print(f"Соединение слушателя {TASKS_CHANNEL} потеряно: {e}")
+        loop.remove_reader(conn.fileno())
+        conn.close()
+        _listener_conn = None
+        loop.call_later(LISTENER_RECONNECT_DELAY, start_listener, loop, True)
+        return
+
+    while conn.notifies:
+        notify = conn.notifies.pop(0)
+        action, _, task_id = notify.payload.partition(":")
+        dispatch(action, int(task_id) if task_id.isdigit() else None)
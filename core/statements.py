@@ -0,0 +1,194 @@
+from functools import lru_cache
+from core.config import USE_POSTGRES
+
+# Реестр запросов. Запросы пишутся один раз с плейсхолдером "?" и
+# компилируются под активную СУБД при импорте модуля.
+STATEMENTS = {
+    "load_tasks": """
+        SELECT id, task, deadline, employee, completed, created_at FROM tasks
+    """,
+    "load_open_tasks": """
+        SELECT id, task, deadline, employee, created_at FROM tasks WHERE completed = 0
+    """,
+    "load_task": """
+        SELECT id, task, deadline, employee, completed, created_at FROM tasks WHERE id = ?
+    """,
+    "insert_task": """
+        INSERT INTO tasks (task, deadline, employee, employee_id, completed, created_at)
+        VALUES (?, ?, ?, ?, 0, ?)
+        RETURNING id
+    """,
+    "delete_task": """
+        DELETE FROM tasks WHERE id = ?
+    """,
+    "insert_late_employee": """
+        INSERT INTO late_employees (employee, employee_id, employee_name, late_time, date, message_text, created_by, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    # NULL в фильтре отключает условие
+    "load_late_employees": """
+        SELECT id, employee, employee_name, late_time, date, message_text, created_by, created_at
+        FROM late_employees
+        WHERE date = COALESCE(?, date) AND employee = COALESCE(?, employee)
+        ORDER BY date DESC, created_at DESC
+    """,
+    "insert_task_event": """
+        INSERT INTO task_events (event_type, task_id, data, created_at)
+        VALUES (?, ?, ?, ?)
+    """,
+    "load_task_events": """
+        SELECT id, event_type, task_id, data, created_at FROM task_events
+        WHERE id > ? ORDER BY id LIMIT ?
+    """,
+    "find_employee_by_telegram_id": """
+        SELECT id FROM employees WHERE telegram_id = ?
+    """,
+    "find_employee_by_username": """
+        SELECT id, telegram_id FROM employees WHERE username = ?
+    """,
+    "release_employee_username": """
+        UPDATE employees SET username = NULL WHERE id = ?
+    """,
+    "find_employee_by_name": """
+        SELECT id FROM employees WHERE username IS NULL AND telegram_id IS NULL AND name = ?
+    """,
+    "upsert_employee_by_username": """
+        INSERT INTO employees (telegram_id, username, name, created_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (username) DO UPDATE SET
+            telegram_id = COALESCE(employees.telegram_id, excluded.telegram_id),
+            name = COALESCE(employees.name, excluded.name)
+        RETURNING id
+    """,
+    "insert_employee": """
+        INSERT INTO employees (telegram_id, username, name, created_at)
+        VALUES (?, ?, ?, ?)
+        RETURNING id
+    """,
+    "link_employee_telegram_id": """
+        UPDATE employees SET telegram_id = ? WHERE id = ? AND telegram_id IS NULL
+    """,
+    # Использует индекс tasks_employee_idx (employee_id, completed, deadline)
+    "load_employee_tasks": """
+        SELECT id, task, deadline, employee, completed, created_at FROM tasks
+        WHERE employee_id = ? AND completed = 0
+    """,
+    "pending_task_employees": """
+        SELECT DISTINCT employee FROM tasks WHERE employee_id IS NULL
+    """,
+    "set_task_employee_id": """
+        UPDATE tasks SET employee_id = ? WHERE employee = ? AND employee_id IS NULL
+    """,
+    "pending_late_employees": """
+        SELECT DISTINCT employee FROM late_employees WHERE employee_id IS NULL
+    """,
+    "set_late_employee_id": """
+        UPDATE late_employees SET employee_id = ? WHERE employee = ? AND employee_id IS NULL
+    """,
+    "get_dialog_state": """
+        SELECT state FROM dialog_state WHERE user_id = ?
+    """,
+    "set_dialog_state": """
+        INSERT INTO dialog_state (user_id, state) VALUES (?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET state = excluded.state
+    """,
+    "delete_dialog_state": """
+        DELETE FROM dialog_state WHERE user_id = ?
+    """,
+    "track_live_message": """
+        INSERT INTO live_messages (chat_id, message_id, view, text_hash, tracked_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (chat_id, message_id) DO UPDATE SET
+            view = excluded.view,
+            text_hash = excluded.text_hash,
+            tracked_at = excluded.tracked_at
+    """,
+    # Оставляет только последние N отслеживаемых сообщений
+    "trim_live_messages": """
+        DELETE FROM live_messages WHERE tracked_at < (
+            SELECT MIN(tracked_at) FROM (
+                SELECT tracked_at FROM live_messages ORDER BY tracked_at DESC LIMIT ?
+            ) AS recent
+        )
+    """,
+    "untrack_live_message": """
+        DELETE FROM live_messages WHERE chat_id = ? AND message_id = ?
+    """,
+    "load_live_messages": """
+        SELECT chat_id, message_id, view, text_hash FROM live_messages
+    """,
+    "update_live_message_hash": """
+        UPDATE live_messages SET text_hash = ? WHERE chat_id = ? AND message_id = ?
+    """,
+    # Настройки /profile: одна строка id = 1, общая для всех воркеров
+    "get_profile_settings": """
+        SELECT remaining, percent FROM profile_settings WHERE id = 1
+    """,
+    "set_profile_settings": """
+        INSERT INTO profile_settings (id, remaining, percent) VALUES (1, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET remaining = excluded.remaining, percent = excluded.percent
+    """,
+    # Атомарно забирает одно обновление из счетчика "следующие N"
+    "take_profile_slot": """
+        UPDATE profile_settings SET remaining = remaining - 1 WHERE id = 1 AND remaining > 0
+    """,
+    # Только PostgreSQL: служебные запросы и очередь обновлений
+    "replica_lag": """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """,
+    "notify": """
+        SELECT pg_notify(?, ?)
+    """,
+    "try_advisory_lock": """
+        SELECT pg_try_advisory_lock(?)
+    """,
+    "advisory_xact_lock": """
+        SELECT pg_advisory_xact_lock(?)
+    """,
+    "enqueue_update": """
+        INSERT INTO update_queue (update_id, chat_id, payload)
+        VALUES (?, ?, ?)
+        ON CONFLICT (update_id) DO NOTHING
+    """,
+    # Только самое раннее обновление каждого чата (см. claim_updates)
+    "claim_updates": """
+        SELECT q.update_id, q.payload FROM update_queue q
+        WHERE NOT EXISTS (
+            SELECT 1 FROM update_queue e
+            WHERE e.chat_id = q.chat_id AND e.update_id < q.update_id
+        )
+        ORDER BY q.update_id
+        LIMIT ?
+        FOR UPDATE SKIP LOCKED
+    """,
+    "ack_updates": """
+        DELETE FROM update_queue WHERE update_id = ANY(?)
+    """,
+}
+
+def compile_statement(sql, postgres=USE_POSTGRES):
+    """Приводит запрос к синтаксису плейсхолдеров драйвера"""
+    sql = " ".join(sql.split())
+    return sql.replace("?", "%s") if postgres else sql
+
+SQL = {name: compile_statement(sql) for name, sql in STATEMENTS.items()}
+
+UPDATE_TASK_FIELDS = ("completed", "task", "deadline", "employee", "employee_id")
+
+@lru_cache(maxsize=None)
+def update_task_statement(fields, only_open=False):
+    """UPDATE tasks только по переданным полям; компилируется один раз на набор полей.
+
+    Поля, которые не меняются, в SET не попадают: иначе индекс
+    (employee_id, completed, deadline) перезаписывался бы при каждом UPDATE.
+    only_open ограничивает запрос невыполненными задачами.
+    """
+    if not set(fields) <= set(UPDATE_TASK_FIELDS):
+        raise ValueError(f"Неизвестные поля задачи: {fields}")
+    assignments = ", ".join(f"{field} = ?" for field in fields)
+    condition = "id = ? AND completed = 0" if only_open else "id = ?"
+    return compile_statement(f"UPDATE tasks SET {assignments} WHERE {condition}")
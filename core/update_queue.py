@@ -0,0 +1,55 @@
+import json
+from core.database import get_connection
+from core.statements import SQL
+
+# Очередь входящих обновлений Telegram (только PostgreSQL).
+# Один receiver пишет обновления, N воркеров разбирают их через SKIP LOCKED.
+
+def init_update_queue():
+    """Создает таблицу очереди обновлений"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS update_queue (
+            update_id BIGINT PRIMARY KEY,
+            chat_id BIGINT,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS update_queue_chat_idx
+        ON update_queue (chat_id, update_id)
+    """)
+    conn.commit()
+    conn.close()
+
+def enqueue_update(update_id, chat_id, payload):
+    """Кладет обновление в очередь (повторная доставка игнорируется)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SQL["enqueue_update"], (update_id, chat_id, json.dumps(payload)))
+        conn.commit()
+    finally:
+        conn.close()
+
+def claim_updates(conn, limit):
+    """Блокирует до limit обновлений в открытой транзакции conn.
+
+    Берется только самое раннее обновление каждого чата: пока оно заблокировано
+    одним воркером, следующие обновления того же чата не видны остальным, что
+    сохраняет порядок внутри чата. Строки удаляются через ack_updates в той же
+    транзакции; при падении воркера блокировки снимаются и обновления
+    достаются другому воркеру.
+    """
+    cursor = conn.cursor()
+    cursor.execute(SQL["claim_updates"], (limit,))
+    return [(row[0], json.loads(row[1])) for row in cursor.fetchall()]
+
+def ack_updates(conn, update_ids):
+    """Удаляет обработанные обновления и фиксирует транзакцию"""
+    if update_ids:
+        cursor = conn.cursor()
+        cursor.execute(SQL["ack_updates"], (list(update_ids),))
+    conn.commit()
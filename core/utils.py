@@ -8,6 +8,13 @@ def normalize_username(username):
         return f"@{username}"
     return username
 
+def employee_username(employee):
+    # Ключ справочника: username без @ в нижнем регистре ("ivan" и "@Ivan" совпадают)
+    employee = normalize_username(employee)
+    if employee and employee.startswith("@") and len(employee) > 1:
+        return employee[1:].lower()
+    return None
+
 def parse_date(date_str):
     for fmt in DATE_FORMATS:
         try:
@@ -25,27 +32,45 @@ def deadline_to_datetime(deadline_str):
             continue
     return datetime.max
 
-def is_overdue(task):
+def is_overdue(task, today=None):
     if task["completed"]:
         return False
     deadline_date = deadline_to_datetime(task["deadline"])
-    return deadline_date.date() < datetime.now().date()
+    return deadline_date.date() < (today or datetime.now().date())
 
-def get_task_status(task):
+def get_task_status(task, today=None):
     if task["completed"]:
         return "✅ Completed"
-    elif is_overdue(task):
+    elif is_overdue(task, today):
         return "⏰ Overdue"
     else:
         return "🟢 In progress"
 
+def _line_spans(text):
+    # Строки сообщения с позициями начала и конца в исходном тексте
+    pos = 0
+    for line in text.split('\n'):
+        yield line, pos, pos + len(line)
+        pos += len(line) + 1
+
+def _text_mention_user(entities, span):
+    # Пользователь из text_mention внутри строки сотрудника (span), если он там есть
+    if span is None:
+        return None
+    start, end = span
+    for entity in entities or []:
+        if entity.type == "text_mention" and entity.user and start <= entity.offset < end:
+            return entity.user
+    return None
+
 def parse_task_message(text, entities):
     task_desc = ""
     deadline = ""
     employee = ""
+    employee_span = None
     
-    for line in text.split('\n'):
-        line = line.strip()
+    for raw_line, start, end in _line_spans(text):
+        line = raw_line.strip()
         line_lower = line.lower()
         if line_lower.startswith("задание:"):
             task_desc = line[line.find(":") + 1:].strip()
@@ -53,7 +78,10 @@ def parse_task_message(text, entities):
             deadline = line[line.find(":") + 1:].strip()
         elif line_lower.startswith("сотрудник:"):
             employee = line[line.find(":") + 1:].strip()
+            employee_span = (start, end)
     
+    # Пользователь берется только из упоминания, которое и задает сотрудника
+    employee_user = _text_mention_user(entities, employee_span)
     if not employee and entities:
         for entity in entities:
             if entity.type == "mention":
@@ -61,9 +89,10 @@ def parse_task_message(text, entities):
                 break
             elif entity.type == "text_mention" and entity.user:
                 employee = f"@{entity.user.username}" if entity.user.username else entity.user.first_name
+                employee_user = entity.user
                 break
     
-    return task_desc, deadline, employee
+    return task_desc, deadline, employee, employee_user
 
 def parse_late_message(text, entities):
     # Парсит сообщение об опоздании
@@ -71,17 +100,20 @@ def parse_late_message(text, entities):
     employee_name = ""
     late_time = ""
     date = ""
+    employee_span = None
     
-    for line in text.split('\n'):
-        line = line.strip()
+    for raw_line, start, end in _line_spans(text):
+        line = raw_line.strip()
         line_lower = line.lower()
         if line_lower.startswith("сотрудник:") or line_lower.startswith("имя:"):
             employee = line[line.find(":") + 1:].strip()
+            employee_span = (start, end)
         elif line_lower.startswith("время:") or line_lower.startswith("опоздал на:"):
             late_time = line[line.find(":") + 1:].strip()
         elif line_lower.startswith("дата:"):
             date = line[line.find(":") + 1:].strip()
     
+    employee_user = _text_mention_user(entities, employee_span)
     if not employee and entities:
         for entity in entities:
             if entity.type == "mention":
@@ -90,9 +122,10 @@ def parse_late_message(text, entities):
             elif entity.type == "text_mention" and entity.user:
                 employee = f"@{entity.user.username}" if entity.user.username else entity.user.first_name
                 employee_name = entity.user.first_name
+                employee_user = entity.user
                 break
     
-    return employee, employee_name, late_time, date
+    return employee, employee_name, late_time, date, employee_user
 
 def format_tasks_list(tasks, show_buttons=True):
     if not tasks:
@@ -102,9 +135,10 @@ def format_tasks_list(tasks, show_buttons=True):
     
     message = "Список заданий:\n\n"
     keyboard_buttons = []
+    today = datetime.now().date()
     
     for task in tasks:
-        status = get_task_status(task)
+        status = get_task_status(task, today)
         employee = normalize_username(task['employee'])
         
         message += f"ID: {task['id']}\n"
@@ -0,0 +1,9 @@
+#!/bin/bash
+# Создает пользователя для потоковой репликации (выполняется при первой инициализации тома)
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-EOSQL
+    CREATE ROLE $REPLICATION_USER WITH REPLICATION LOGIN PASSWORD '$REPLICATION_PASSWORD';
+EOSQL
+
+echo "host replication $REPLICATION_USER all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,20 @@
+#!/bin/bash
+# Поднимает горячую реплику: при пустом томе копирует primary через pg_basebackup -R
+# (создает standby.signal и primary_conninfo), затем запускает сервер.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_isready -h "$PRIMARY_HOST" -p "$PRIMARY_PORT" -U "$REPLICATION_USER"; do
+        echo "Ожидание primary $PRIMARY_HOST:$PRIMARY_PORT..."
+        sleep 2
+    done
+
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    PGPASSWORD="$REPLICATION_PASSWORD" gosu postgres pg_basebackup \
+        -h "$PRIMARY_HOST" -p "$PRIMARY_PORT" -U "$REPLICATION_USER" \
+        -D "$PGDATA" -R -X stream -P
+fi
+
+exec gosu postgres postgres -c hot_standby=on
@@ -3,9 +3,31 @@ from telegram.ext import ContextTypes
 from datetime import datetime
 from core.config import MAIN_MENU_TEXT, HELP_TEXT, ADD_TASK_INSTRUCTIONS
 from core.database import load_tasks, update_task, delete_task_by_id, load_late_employees
-from core.utils import format_tasks_list, is_overdue
+from core.config import DUE_SOON_DAYS
+from core.deadline_index import overdue_tasks, due_within
+from core.utils import format_tasks_list
 from ui.keyboards import get_main_menu_keyboard, get_list_filter_keyboard, get_back_menu_keyboard
 from handlers.commands import add_late_employee
+from handlers.live import track_message, untrack_message
+
+# Списки заданий: callback_data -> (выборка, сообщение для пустого списка).
+# Выборка получает функцию загрузки всех задач; списки по дедлайнам
+# берутся из индекса в памяти и таблицу не читают.
+LIST_VIEWS = {
+    "list_all": (lambda load: load(), "Список заданий пуст."),
+    "list_active": (lambda load: [x for x in load() if not x["completed"]], "Активных заданий нет."),
+    "list_done": (lambda load: [x for x in load() if x["completed"]], "Выполненных заданий нет."),
+    "list_overdue": (lambda load: overdue_tasks(), "Просроченных заданий нет."),
+    "list_due_soon": (lambda load: due_within(DUE_SOON_DAYS), f"Заданий с дедлайном в ближайшие {DUE_SOON_DAYS} дн. нет."),
+}
+
+def render_view(view, load=load_tasks):
+    """Возвращает текст и клавиатуру для списка заданий"""
+    select, empty_message = LIST_VIEWS[view]
+    message, keyboard = format_tasks_list(select(load))
+    if message:
+        return message, keyboard
+    return empty_message, get_list_filter_keyboard()
 
 async def show_list_filter(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = get_list_filter_keyboard()
@@ -52,13 +74,10 @@ async def show_late_employees(update: Update, context: ContextTypes.DEFAULT_TYPE
     elif update.message:
         await update.message.reply_text(message, reply_markup=keyboard)
 
-async def handle_list_callback(query, filter_func, empty_message):
-    tasks = filter_func(load_tasks())
-    message, keyboard = format_tasks_list(tasks)
-    if message:
-        await query.edit_message_text(message, reply_markup=keyboard)
-    else:
-        await query.edit_message_text(empty_message, reply_markup=get_list_filter_keyboard())
+async def handle_list_callback(query, view):
+    message, keyboard = render_view(view)
+    await query.edit_message_text(message, reply_markup=keyboard)
+    track_message(query.message, view, message)
 
 async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -67,6 +86,8 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     await query.answer()
     data = query.data
+    # Сообщение сменит содержимое; списки снова регистрируются при отрисовке
+    untrack_message(query.message)
     
     if data == "main_menu":
         await query.edit_message_text(MAIN_MENU_TEXT, reply_markup=get_main_menu_keyboard())
@@ -78,17 +99,8 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         keyboard = get_back_menu_keyboard()
         await query.edit_message_text(ADD_TASK_INSTRUCTIONS, reply_markup=keyboard)
     
-    elif data == "list_all":
-        await handle_list_callback(query, lambda t: t, "Список заданий пуст.")
-    
-    elif data == "list_active":
-        await handle_list_callback(query, lambda t: [x for x in t if not x["completed"]], "Активных заданий нет.")
-    
-    elif data == "list_done":
-        await handle_list_callback(query, lambda t: [x for x in t if x["completed"]], "Выполненных заданий нет.")
-    
-    elif data == "list_overdue":
-        await handle_list_callback(query, lambda t: [x for x in t if is_overdue(x)], "Просроченных заданий нет.")
+    elif data in LIST_VIEWS:
+        await handle_list_callback(query, data)
     
     elif data == "add_late":
         await add_late_employee(update, context)
@@ -98,25 +110,16 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     elif data.startswith("complete_"):
         task_id = int(data.split("_")[1])
-        tasks = load_tasks()
-        task = next((t for t in tasks if t["id"] == task_id), None)
-        if task:
-            update_task(task_id, completed=True)
+        if update_task(task_id, completed=True):
             await query.answer(f"Задание #{task_id} отмечено как выполненное!")
-            tasks = load_tasks()
-            message, keyboard = format_tasks_list(tasks)
-            if message:
-                await query.edit_message_text(message, reply_markup=keyboard)
+            await handle_list_callback(query, "list_all")
         else:
-            await query.answer("Задание не найдено!")
+            await query.answer("Задание не найдено или уже выполнено!")
     
     elif data.startswith("delete_"):
         task_id = int(data.split("_")[1])
-        delete_task_by_id(task_id)
-        await query.answer(f"Задание #{task_id} удалено!")
-        tasks = load_tasks()
-        message, keyboard = format_tasks_list(tasks)
-        if message:
-            await query.edit_message_text(message, reply_markup=keyboard)
+        if delete_task_by_id(task_id):
+            await query.answer(f"Задание #{task_id} удалено!")
         else:
-            await query.edit_message_text("Список заданий пуст.", reply_markup=get_list_filter_keyboard())
+            await query.answer("Задание не найдено!")
+        await handle_list_callback(query, "list_all")
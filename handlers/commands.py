@@ -1,6 +1,6 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from core.config import MAIN_MENU_TEXT, HELP_TEXT, ADD_TASK_INSTRUCTIONS, ADD_LATE_INSTRUCTIONS
+from core.config import MAIN_MENU_TEXT, HELP_TEXT, ADD_TASK_INSTRUCTIONS, ADD_LATE_INSTRUCTIONS, ADMIN_IDS
 from ui.keyboards import get_main_menu_keyboard, get_back_menu_keyboard
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -27,21 +27,33 @@ async def list_tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     await show_list_filter(update, context)
 
+async def my_tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from core.database import find_employee, load_employee_tasks
+    from core.utils import format_tasks_list
+    if not update.message:
+        return
+    
+    user = update.message.from_user
+    employee_id = find_employee(user.id, user.username)
+    tasks = load_employee_tasks(employee_id) if employee_id else []
+    message, keyboard = format_tasks_list(tasks)
+    if message:
+        await update.message.reply_text(message, reply_markup=keyboard)
+    else:
+        await update.message.reply_text("У вас нет активных заданий.", reply_markup=get_main_menu_keyboard())
+
 async def complete_task_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    from core.database import load_tasks, update_task
+    from core.database import update_task
     if not update.message or not context.args:
         await update.message.reply_text("Укажите ID задания.\nПример: /complete_task 1")
         return
     
     try:
         task_id = int(context.args[0])
-        tasks = load_tasks()
-        task = next((t for t in tasks if t["id"] == task_id), None)
-        if task:
-            update_task(task_id, completed=True)
+        if update_task(task_id, completed=True):
             await update.message.reply_text(f"Задание #{task_id} отмечено как выполненное!")
         else:
-            await update.message.reply_text(f"Задание с ID {task_id} не найдено.")
+            await update.message.reply_text(f"Задание с ID {task_id} не найдено или уже выполнено.")
     except ValueError:
         await update.message.reply_text("ID должен быть числом!")
 
@@ -54,17 +66,57 @@ async def delete_task_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     try:
         task_id = int(context.args[0])
-        delete_task_by_id(task_id)
-        await update.message.reply_text(f"Задание #{task_id} удалено!", reply_markup=get_main_menu_keyboard())
+        if delete_task_by_id(task_id):
+            await update.message.reply_text(f"Задание #{task_id} удалено!", reply_markup=get_main_menu_keyboard())
+        else:
+            await update.message.reply_text(f"Задание с ID {task_id} не найдено.")
     except ValueError:
         await update.message.reply_text("ID должен быть числом!")
 
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from handlers.profiling import enable_profiling, disable_profiling, profiling_status
+    if not update.message:
+        return
+    if update.message.from_user.id not in ADMIN_IDS:
+        await update.message.reply_text("Команда доступна только администраторам.")
+        return
+    
+    if not context.args:
+        await update.message.reply_text(
+            f"{profiling_status()}\n\n"
+            "/profile 20 - профилировать следующие 20 обновлений\n"
+            "/profile 5% - профилировать 5% обновлений\n"
+            "/profile off - выключить"
+        )
+        return
+    
+    arg = context.args[0].strip()
+    try:
+        if arg.lower() == "off":
+            disable_profiling()
+        elif arg.endswith("%"):
+            percent = float(arg[:-1])
+            if not 0 < percent <= 100:
+                raise ValueError
+            enable_profiling(percent=percent)
+        else:
+            count = int(arg)
+            if count <= 0:
+                raise ValueError
+            enable_profiling(count=count)
+    except ValueError:
+        await update.message.reply_text("Укажите число обновлений, процент (например 5%) или off.")
+        return
+    
+    await update.message.reply_text(profiling_status())
+
 async def add_late_employee(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from core.database import set_dialog_state
     if update.callback_query:
         keyboard = get_back_menu_keyboard()
         await update.callback_query.edit_message_text(ADD_LATE_INSTRUCTIONS, reply_markup=keyboard)
         await update.callback_query.answer()
-        context.user_data['waiting_for_late'] = True
+        set_dialog_state(update.effective_user.id, "waiting_for_late")
     elif update.message:
         await update.message.reply_text(ADD_LATE_INSTRUCTIONS, reply_markup=get_main_menu_keyboard())
-        context.user_data['waiting_for_late'] = True
+        set_dialog_state(update.effective_user.id, "waiting_for_late")
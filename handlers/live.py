@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+from telegram.error import BadRequest, TelegramError
+from core.config import USE_POSTGRES
+from core.database import (
+    load_tasks, route_reads_to_primary, try_advisory_lock,
+    track_live_message, untrack_live_message, load_live_messages, update_live_message_hash
+)
+from core.events import subscribe, on_listener_resync
+
+# Пауза перед перерисовкой: серия изменений дает одно редактирование на сообщение
+REFRESH_DELAY = 1.0
+MAX_TRACKED_MESSAGES = 200
+# Ключ advisory lock: перерисовку выполняет только один воркер
+LIVE_REFRESH_LOCK = 26026
+
+# Отслеживаемые сообщения хранятся в таблице live_messages, чтобы у всех
+# воркеров было одно представление на сообщение
+_bot = None
+_refresh_task = None
+_dirty = False
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def track_message(message, view, text):
+    """Запоминает, какой список показывает сообщение"""
+    if message is None:
+        return
+    track_live_message(message.chat_id, message.message_id, view, text_hash(text), MAX_TRACKED_MESSAGES)
+
+def untrack_message(message):
+    if message is None:
+        return
+    untrack_live_message(message.chat_id, message.message_id)
+
+def _on_resync():
+    # Пропущенные изменения неизвестны — перерисовываем все открытые списки
+    _on_change("resync", None)
+
+def _on_change(action, task_id):
+    global _refresh_task, _dirty
+    if _bot is None:
+        return
+    _dirty = True
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh_loop())
+
+async def _refresh_loop():
+    global _dirty
+    # Перерисовка вызвана записью — реплика может еще не содержать изменений
+    route_reads_to_primary()
+    while _dirty:
+        await asyncio.sleep(REFRESH_DELAY)
+        _dirty = False
+        
+        # Уведомление получают все воркеры; остальные пропускают проход, пока
+        # один перерисовывает (держатель блокировки тоже получит новые события)
+        lock_conn = try_advisory_lock(LIVE_REFRESH_LOCK) if USE_POSTGRES else None
+        if USE_POSTGRES and lock_conn is None:
+            continue
+        try:
+            await _refresh_tracked()
+        except Exception as e:
+            print(f"Не удалось обновить открытые списки: {e}")
+        finally:
+            if lock_conn is not None:
+                lock_conn.close()
+
+async def _refresh_tracked():
+    from handlers.callbacks import render_view
+    loaded = []
+    rendered = {}
+    
+    def load():
+        # Все задачи читаются не больше одного раза за проход
+        if not loaded:
+            loaded.append(load_tasks())
+        return loaded[0]
+
+    for entry in load_live_messages():
+        view = entry["view"]
+        if view not in rendered:
+            text, keyboard = render_view(view, load)
+            rendered[view] = (text, keyboard, text_hash(text))
+        text, keyboard, new_hash = rendered[view]
+        if new_hash == entry["text_hash"]:
+            continue
+
+        chat_id, message_id = entry["chat_id"], entry["message_id"]
+        try:
+            await _bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, reply_markup=keyboard)
+            update_live_message_hash(chat_id, message_id, new_hash)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                update_live_message_hash(chat_id, message_id, new_hash)
+            else:
+                # Сообщение удалено или больше недоступно
+                untrack_live_message(chat_id, message_id)
+        except TelegramError as e:
+            print(f"Не удалось обновить сообщение {message_id}: {e}")
+
+async def start_live_refresh(application):
+    """Запускает автообновление открытых списков заданий (post_init)"""
+    global _bot
+    _bot = application.bot
+    subscribe(_on_change)
+    on_listener_resync(_on_resync)
@@ -1,7 +1,9 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from datetime import datetime
-from core.database import insert_task, insert_late_employee
+from core.database import (
+    insert_task, insert_late_employee, get_or_create_employee, get_dialog_state, set_dialog_state
+)
 from core.utils import parse_task_message, parse_late_message, normalize_username, parse_date
 from ui.keyboards import get_main_menu_keyboard
 from core.config import ADD_TASK_INSTRUCTIONS
@@ -12,8 +14,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     text = update.message.text.strip()
     
-    # Проверяем, ожидаем ли информацию об опоздании
-    if context.user_data.get('waiting_for_late'):
+    # Проверяем, ожидаем ли информацию об опоздании (состояние хранится в БД,
+    # чтобы следующее сообщение мог обработать любой воркер)
+    if get_dialog_state(update.effective_user.id) == "waiting_for_late":
         await handle_late_message(update, context, text)
         return
     
@@ -21,9 +24,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await handle_task_message(update, context, text)
 
 async def handle_late_message(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
-    context.user_data['waiting_for_late'] = False
+    set_dialog_state(update.effective_user.id, None)
     
-    employee, employee_name, late_time, date = parse_late_message(text, update.message.entities or [])
+    employee, employee_name, late_time, date, employee_user = parse_late_message(text, update.message.entities or [])
     employee = normalize_username(employee) if employee else None
     
     if not employee:
@@ -50,8 +53,15 @@ async def handle_late_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     # Сохраняем опоздание
     created_by = f"@{update.message.from_user.username}" if update.message.from_user.username else update.message.from_user.first_name
+    if employee_user:
+        employee_id = get_or_create_employee(
+            employee, employee_user.id, employee_name or employee_user.first_name, employee_user.username
+        )
+    else:
+        employee_id = get_or_create_employee(employee, name=employee_name or None)
     insert_late_employee(
         employee=employee,
+        employee_id=employee_id,
         employee_name=employee_name,
         late_time=late_time if late_time else None,
         message_text=text,
@@ -80,7 +90,7 @@ async def handle_task_message(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return
     
-    task_desc, deadline, employee = parse_task_message(text, update.message.entities)
+    task_desc, deadline, employee, employee_user = parse_task_message(text, update.message.entities)
     employee = normalize_username(employee) if employee else "Не указан"
     
     if not task_desc or not deadline:
@@ -97,7 +107,13 @@ async def handle_task_message(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     created_at = datetime.now().strftime("%d.%m.%Y %H:%M")
-    task_id = insert_task(task_desc, deadline_formatted, employee, created_at)
+    if employee_user:
+        employee_id = get_or_create_employee(
+            employee, employee_user.id, employee_user.first_name, employee_user.username
+        )
+    else:
+        employee_id = get_or_create_employee(employee)
+    task_id = insert_task(task_desc, deadline_formatted, employee, created_at, employee_id)
     
     await update.message.reply_text(
         f"Задание добавлено!\n\n"
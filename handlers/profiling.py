@@ -0,0 +1,168 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from core.config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL
+from core.database import get_profile_settings, set_profile_settings, take_profile_slot
+
+# Настройки /profile хранятся в таблице profile_settings и действуют на все
+# воркеры. Процесс перечитывает их не чаще раза в SETTINGS_CACHE_TTL секунд,
+# поэтому при выключенном профилировании остается проверка флага и времени.
+SETTINGS_CACHE_TTL = 1.0
+
+_enabled = False
+_remaining = 0
+_percent = 0.0
+_checked_at = None
+
+TELEGRAM_PACKAGE = os.sep + "telegram" + os.sep
+DATABASE_MODULE = os.path.join("core", "database.py")
+
+def enable_profiling(count=0, percent=0.0):
+    """Профилирует следующие count обновлений или percent% трафика (во всех воркерах)"""
+    set_profile_settings(count, percent)
+    _refresh_settings(time.monotonic())
+
+def disable_profiling():
+    enable_profiling()
+
+def profiling_status():
+    remaining, percent = get_profile_settings()
+    if remaining:
+        return f"Профилируются следующие {remaining} обновлений."
+    if percent:
+        return f"Профилируется {percent:g}% обновлений."
+    return "Профилирование выключено."
+
+def _refresh_settings(now):
+    global _enabled, _remaining, _percent, _checked_at
+    _checked_at = now
+    try:
+        _remaining, _percent = get_profile_settings()
+    except Exception as e:
+        print(f"Не удалось прочитать настройки профилирования: {e}")
+        return
+    _enabled = _remaining > 0 or _percent > 0
+
+def _profiling_enabled():
+    now = time.monotonic()
+    if _checked_at is None or now - _checked_at >= SETTINGS_CACHE_TTL:
+        _refresh_settings(now)
+    return _enabled
+
+def _take_update():
+    global _enabled, _remaining
+    if _remaining > 0:
+        # Счетчик общий: обновление достается тому воркеру, который успел его уменьшить
+        if take_profile_slot():
+            return True
+        _remaining = 0
+        _enabled = _percent > 0
+    return random.random() * 100 < _percent
+
+def profiled(callback):
+    """Оборачивает обработчик; при выключенном профилировании лишь проверяет флаг"""
+    @wraps(callback)
+    async def wrapper(update, context):
+        if not _profiling_enabled() or not _take_update():
+            return await callback(update, context)
+        return await _profile_call(callback, update, context)
+    return wrapper
+
+async def _profile_call(callback, update, context):
+    sampler = _Sampler(threading.get_ident(), asyncio.current_task())
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        return await callback(update, context)
+    finally:
+        sampler.stop()
+        _write_profile(callback.__name__, update, sampler, time.perf_counter() - started)
+
+class _Sampler(threading.Thread):
+    """Периодически снимает стек потока event loop, пока идет обработка обновления"""
+
+    def __init__(self, thread_id, task):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.task = task
+        self.stacks = Counter()
+        self.totals = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._stopped.wait(PROFILE_SAMPLE_INTERVAL):
+            now = time.perf_counter()
+            frames = self._sample()
+            if frames:
+                category = _categorize(frames)
+                self.stacks[(category,) + tuple(_label(frame) for frame in frames)] += 1
+                self.totals[category] += now - last
+            last = now
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        stack = _from_profile_call(frames)
+        if stack:
+            return stack
+        # Поток занят другим или ждет ввода-вывода: берем стек приостановленной корутины
+        return _from_profile_call(_coroutine_frames(self.task.get_coro()))
+
+def _coroutine_frames(coro):
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+def _from_profile_call(frames):
+    for i, frame in enumerate(frames):
+        if frame.f_code is _profile_call.__code__:
+            return frames[i + 1:]
+    return []
+
+def _categorize(frames):
+    filenames = [frame.f_code.co_filename for frame in frames]
+    if any(name.endswith(DATABASE_MODULE) or "psycopg2" in name or "sqlite3" in name for name in filenames):
+        return "db"
+    if any(frame.f_code.co_name == "format_tasks_list" for frame in frames):
+        return "render"
+    if any(TELEGRAM_PACKAGE in name for name in filenames):
+        return "telegram_api"
+    return "handler"
+
+def _label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def _write_profile(handler_name, update, sampler, elapsed):
+    """Пишет профиль в формате collapsed stacks (flamegraph.pl, speedscope)"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(PROFILE_DIR, f"{stamp}_{update.update_id}_{handler_name}.folded")
+    with open(path, "w") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{handler_name};{';'.join(stack)} {count}\n")
+
+    breakdown = ", ".join(
+        f"{category} {seconds * 1000:.0f} мс" for category, seconds in sampler.totals.most_common()
+    )
+    print(f"Профиль {path}: всего {elapsed * 1000:.0f} мс ({breakdown or 'нет сэмплов'})")
@@ -1,24 +1,39 @@
+import asyncio
+import signal
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
-from core.config import BOT_TOKEN
-from core.database import init_db
+from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, TypeHandler, filters
+from core.config import BOT_TOKEN, BOT_MODE, USE_POSTGRES, WORKER_BATCH_SIZE, WORKER_POLL_INTERVAL
+from core.database import init_db, get_connection, reset_read_routing
+from core.deadline_index import start_deadline_index
+from core.event_log import start_event_log, stop_event_log
+from core.events import start_listener
+from core.update_queue import init_update_queue, enqueue_update, claim_updates, ack_updates
 from handlers.commands import (
-    start, help_command, add_task_command, list_tasks_command,
-    complete_task_command, delete_task_command
+    start, help_command, add_task_command, list_tasks_command, my_tasks_command,
+    complete_task_command, delete_task_command, profile_command
 )
 from handlers.callbacks import callback_handler
 from handlers.messages import handle_message
+from handlers.live import start_live_refresh
+from handlers.profiling import profiled
 
-def main():
-    init_db()
-    
-    if not BOT_TOKEN:
-        print("Ошибка! Токен бота не найден.")
-        print("Создайте файл .env и добавьте в него строку:")
-        print("BOT_TOKEN=ваш_токен_здесь")
-        return
-    
-    application = Application.builder().token(BOT_TOKEN).build()
+async def on_startup(application):
+    # LISTEN до снимка индекса: изменение, зафиксированное во время загрузки,
+    # придет уведомлением и будет применено после нее
+    start_listener(asyncio.get_running_loop())
+    start_deadline_index()
+    await start_live_refresh(application)
+    start_event_log()
+
+async def on_shutdown(application):
+    stop_event_log()
+
+async def reset_routing(update: Update, context):
+    reset_read_routing()
+
+def register_handlers(application):
+    # Каждое обновление начинает с чтения из реплик (если они настроены)
+    application.add_handler(TypeHandler(Update, reset_routing), group=-1)
     
     # Регистрация обработчиков команд
     application.add_handler(CommandHandler("start", start))
@@ -26,14 +41,85 @@ def main():
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("add_task", add_task_command))
     application.add_handler(CommandHandler("list_tasks", list_tasks_command))
+    application.add_handler(CommandHandler("my_tasks", my_tasks_command))
     application.add_handler(CommandHandler("complete_task", complete_task_command))
     application.add_handler(CommandHandler("delete_task", delete_task_command))
+    application.add_handler(CommandHandler("profile", profile_command))
     
     # Обработчик callback-кнопок
-    application.add_handler(CallbackQueryHandler(callback_handler))
+    application.add_handler(CallbackQueryHandler(profiled(callback_handler)))
     
     # Обработчик обычных сообщений
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, profiled(handle_message)))
+
+async def enqueue_incoming(update: Update, context):
+    chat = update.effective_chat
+    enqueue_update(update.update_id, chat.id if chat else None, update.to_dict())
+
+async def run_worker(application):
+    """Обрабатывает обновления из очереди вместо getUpdates"""
+    # SIGTERM/SIGINT (docker compose stop, уменьшение числа воркеров) завершают
+    # текущий пакет и штатно вызывают post_shutdown
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    
+    async with application:
+        await application.post_init(application)
+        conn = get_connection()
+        try:
+            while not stop.is_set():
+                claimed = claim_updates(conn, WORKER_BATCH_SIZE)
+                if not claimed:
+                    conn.rollback()
+                    try:
+                        await asyncio.wait_for(stop.wait(), WORKER_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                for update_id, payload in claimed:
+                    await application.process_update(Update.de_json(payload, application.bot))
+                ack_updates(conn, [update_id for update_id, _ in claimed])
+        finally:
+            conn.close()
+            await application.post_shutdown(application)
+    print("Воркер остановлен")
+
+def main():
+    init_db()
+    
+    if not BOT_TOKEN:
+        print("Ошибка! Токен бота не найден.")
+        print("Создайте файл .env и добавьте в него строку:")
+        print("BOT_TOKEN=ваш_токен_здесь")
+        return
+    
+    if BOT_MODE not in ("polling", "receiver", "worker"):
+        print(f"Неизвестный режим BOT_MODE={BOT_MODE}. Допустимо: polling, receiver, worker")
+        return
+    
+    if BOT_MODE != "polling":
+        if not USE_POSTGRES:
+            print("Режимы receiver и worker работают только с PostgreSQL (USE_POSTGRES=true)")
+            return
+        init_update_queue()
+    
+    if BOT_MODE == "receiver":
+        # Receiver только складывает обновления в очередь, обработкой занимаются воркеры
+        application = Application.builder().token(BOT_TOKEN).build()
+        application.add_handler(TypeHandler(Update, enqueue_incoming))
+        print("Receiver запущен: обновления пишутся в очередь")
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        return
+    
+    application = Application.builder().token(BOT_TOKEN).post_init(on_startup).post_shutdown(on_shutdown).build()
+    register_handlers(application)
+    
+    if BOT_MODE == "worker":
+        print("Воркер запущен и обрабатывает очередь обновлений")
+        asyncio.run(run_worker(application))
+        return
     
     print("Бот запущен и готов к работе!")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
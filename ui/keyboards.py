@@ -18,6 +18,7 @@ def get_main_menu_keyboard():
         [("🟢 Активные", "list_active")],
         [("✅ Выполненные", "list_done")],
         [("⏰ Просроченные", "list_overdue")],
+        [("📅 Скоро дедлайн", "list_due_soon")],
         [("🚶 Назначить опоздавшего", "add_late")],
         [("📝 Список опоздавших", "list_late")],
         [("❓ Помощь", "help")]
@@ -30,6 +31,7 @@ def get_list_filter_keyboard():
         [("🟢 Активные", "list_active")],
         [("✅ Выполненные", "list_done")],
         [("⏰ Просроченные", "list_overdue")],
+        [("📅 Скоро дедлайн", "list_due_soon")],
         [("◀️ Главное меню", "main_menu")]
     ]
     return create_keyboard(buttons)